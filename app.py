@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 st.set_page_config(layout='wide', page_title='Advanced Bank Transaction Analysis')
 
@@ -5,53 +8,80 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objs as go
-from scipy import stats
+import plotly.io as pio
+
+# Figures are serialized to JSON for every st.plotly_chart call; orjson is much
+# faster than the stdlib encoder, and NumPy trace arrays go out as typed binary blocks
+pio.json.config.default_engine = 'orjson'
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
 
 class AdvancedBankAnalysisDashboard:
     def __init__(self, data):
         """Initialize the dashboard with bank transaction data"""
         self.data = self._preprocess_data(data)
-        self.credits = self.data[self.data['DrCr'] == 'Cr']
-        self.debits = self.data[self.data['DrCr'] == 'Db']
+        # Monthly totals per transaction type, shared by metrics and trend charts.
+        # Amounts are stored as float32, so monetary totals accumulate in float64.
+        self._monthly = (
+            self.data[['month', 'DrCr']]
+            .assign(amount=self.data['amount'].astype(np.float64))
+            .pivot_table(index='month', columns='DrCr', values='amount', aggfunc='sum', observed=True, sort=True)
+        )
 
     def _preprocess_data(self, data):
         """Advanced data preprocessing"""
-        data['date'] = pd.to_datetime(data['date'])
-        data['name'] = data['name'].fillna('Unknown')
-        data['month'] = data['date'].dt.to_period('M')
-        data['day_of_week'] = data['date'].dt.day_name()
-        data['quarter'] = data['date'].dt.to_period('Q')
-        return data.drop_duplicates()
+        # Deduplicate on the raw transaction columns, before derived columns are added
+        data = data.drop_duplicates(ignore_index=True)
+        data['name'] = data['name'].fillna('Unknown').astype('category')
+        data['DrCr'] = data['DrCr'].astype('category')
+        data['amount'] = pd.to_numeric(data['amount'], downcast='float')
+        # Integer month key equal to the monthly Period ordinal (months since 1970-01);
+        # nullable so undated rows get <NA> and drop out of the monthly pivot
+        data['month'] = (
+            (data['date'].dt.year.astype('Int32') - 1970) * 12
+            + data['date'].dt.month.astype('Int32') - 1
+        )
+        data['day_of_week'] = pd.Categorical(data['date'].dt.day_name(), categories=DAY_ORDER)
+        data['hour'] = data['date'].dt.hour
+        return data
 
     def calculate_advanced_metrics(self):
         """Calculate comprehensive financial metrics"""
-        total_income = self.credits['amount'].sum()
-        total_expenses = self.debits['amount'].sum()
+        # Totals cover every transaction, including undated ones missing from the monthly pivot
+        totals = self.data['amount'].astype(np.float64).groupby(self.data['DrCr'], observed=True).sum()
+        total_income = totals['Cr']
+        total_expenses = totals['Db']
         savings_rate = (total_income - total_expenses) / total_income * 100
         
         # Cash flow volatility
-        monthly_cash_flow = self.data.groupby(self.data['date'].dt.to_period('M'))['amount'].sum()
+        monthly_cash_flow = self._monthly.sum(axis=1)
         cash_flow_volatility = monthly_cash_flow.std() / monthly_cash_flow.mean() * 100
 
         return {
             'total_income': total_income,
             'total_expenses': total_expenses,
             'savings_rate': savings_rate,
-            'avg_monthly_income': self.credits.groupby('month')['amount'].sum().mean(),
-            'avg_monthly_expenses': self.debits.groupby('month')['amount'].sum().mean(),
+            'avg_monthly_income': self._monthly['Cr'].mean(),
+            'avg_monthly_expenses': self._monthly['Db'].mean(),
             'cash_flow_volatility': cash_flow_volatility
         }
 
     def detect_anomalies_advanced(self):
         """Advanced anomaly detection using multiple methods"""
+        # Anomaly tables are shown to users, so leave out the internal month/hour keys
+        transactions = self.data.drop(columns=['month', 'hour'])
+        
+        # Both statistical methods are range tests over the same amount buffer
+        amount = self.data['amount'].to_numpy()
+        
         # Z-score method
-        z_score_anomalies = self._detect_zscore_anomalies()
+        z_score_anomalies = self._detect_zscore_anomalies(transactions, amount)
         
         # Interquartile range method
-        iqr_anomalies = self._detect_iqr_anomalies()
+        iqr_anomalies = self._detect_iqr_anomalies(transactions, amount)
         
         # Time-based unusual transactions
-        time_anomalies = self._detect_time_based_anomalies()
+        time_anomalies = self._detect_time_based_anomalies(transactions)
         
         return {
             'z_score_anomalies': z_score_anomalies,
@@ -59,59 +89,63 @@ class AdvancedBankAnalysisDashboard:
             'time_anomalies': time_anomalies
         }
 
-    def _detect_zscore_anomalies(self):
+    def _detect_zscore_anomalies(self, transactions, amount):
         """Detect anomalies using Z-score method"""
-        z_scores = np.abs(stats.zscore(self.data['amount']))
-        return self.data[z_scores > 3]
+        mask = np.abs(amount - amount.mean(dtype=np.float64)) > 3 * amount.std(dtype=np.float64)
+        return transactions.iloc[np.flatnonzero(mask)]
 
-    def _detect_iqr_anomalies(self):
+    def _detect_iqr_anomalies(self, transactions, amount):
         """Detect anomalies using Interquartile Range method"""
-        Q1 = self.data['amount'].quantile(0.25)
-        Q3 = self.data['amount'].quantile(0.75)
+        Q1, Q3 = np.nanpercentile(amount, [25, 75])
         IQR = Q3 - Q1
-        return self.data[(self.data['amount'] < (Q1 - 1.5 * IQR)) | (self.data['amount'] > (Q3 + 1.5 * IQR))]
+        mask = (amount < (Q1 - 1.5 * IQR)) | (amount > (Q3 + 1.5 * IQR))
+        return transactions.iloc[np.flatnonzero(mask)]
 
-    def _detect_time_based_anomalies(self):
+    def _detect_time_based_anomalies(self, transactions):
         """Detect unusual time-based transactions"""
         # Find transactions outside typical transaction hours or days
-        late_night_transactions = self.data[
-            (self.data['date'].dt.hour < 6) | (self.data['date'].dt.hour > 22)
-        ]
-        weekend_transactions = self.data[self.data['date'].dt.day_name().isin(['Saturday', 'Sunday'])]
+        hour = self.data['hour'].to_numpy()
+        day_codes = self.data['day_of_week'].cat.codes.to_numpy()
+        late_night_mask = (hour < 6) | (hour > 22)
+        weekend_mask = day_codes >= DAY_ORDER.index('Saturday')
         
         return {
-            'late_night_transactions': late_night_transactions,
-            'weekend_transactions': weekend_transactions
+            'late_night_transactions': transactions.iloc[np.flatnonzero(late_night_mask)],
+            'weekend_transactions': transactions.iloc[np.flatnonzero(weekend_mask)]
         }
 
     def visualize_advanced_trends(self):
         """Create advanced trend visualizations"""
         # Monthly income vs expenses with trend line
-        monthly_summary = self.data.groupby([self.data['date'].dt.to_period('M'), 'DrCr'])['amount'].sum().unstack()
+        monthly_summary = self._monthly
+        months = [f"{1970 + m // 12}-{m % 12 + 1:02d}" for m in monthly_summary.index]
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=monthly_summary.index.astype(str), 
-            y=monthly_summary['Cr'], 
+            x=months, 
+            y=monthly_summary['Cr'].to_numpy(dtype=np.float64), 
             mode='lines+markers', 
             name='Income', 
             line=dict(color='green')
         ))
         fig.add_trace(go.Scatter(
-            x=monthly_summary.index.astype(str), 
-            y=monthly_summary['Db'], 
+            x=months, 
+            y=monthly_summary['Db'].to_numpy(dtype=np.float64), 
             mode='lines+markers', 
             name='Expenses', 
             line=dict(color='red')
         ))
         
-        # Trend line
-        trend_line = np.polyfit(range(len(monthly_summary)), monthly_summary['Db'], 1)
-        trend_fn = np.poly1d(trend_line)
+        # Trend line (closed-form least squares fit of degree 1)
+        x = np.arange(len(monthly_summary), dtype=np.float64)
+        y = monthly_summary['Db'].to_numpy(dtype=np.float64)
+        x_mean, y_mean = x.mean(), y.mean()
+        slope = ((x - x_mean) * (y - y_mean)).sum() / ((x - x_mean) ** 2).sum()
+        intercept = y_mean - slope * x_mean
         
         fig.add_trace(go.Scatter(
-            x=monthly_summary.index.astype(str), 
-            y=trend_fn(range(len(monthly_summary))), 
+            x=months, 
+            y=slope * x + intercept, 
             mode='lines', 
             name='Expense Trend', 
             line=dict(color='purple', dash='dot')
@@ -128,23 +162,37 @@ class AdvancedBankAnalysisDashboard:
 
     def visualize_comprehensive_distribution(self):
         """Create comprehensive transaction distribution visualizations"""
-        # Spending by day of week
-        day_spending = self.debits.groupby('day_of_week')['amount'].sum()
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_spending = day_spending.reindex(day_order)
+        # One debit mask and amount buffer shared by both aggregations; missing
+        # amounts are skipped, as groupby sums do, rather than turning totals into NaN
+        amount = self.data['amount'].to_numpy()
+        is_debit = (self.data['DrCr'] == 'Db').to_numpy() & ~np.isnan(amount)
+        debit_amounts = amount[is_debit]
+
+        # Spending by day of week (category codes follow DAY_ORDER; undated rows are -1)
+        day_codes = self.data['day_of_week'].cat.codes.to_numpy()[is_debit]
+        has_day = day_codes >= 0
+        day_totals = np.bincount(day_codes[has_day], weights=debit_amounts[has_day], minlength=len(DAY_ORDER))
+        day_spending = pd.Series(day_totals, index=DAY_ORDER)
         
         fig_day_spend = px.bar(
             x=day_spending.index, 
-            y=day_spending.values, 
+            y=day_spending.to_numpy(dtype=np.float64), 
             title='Spending Distribution by Day of Week (₹)',
             labels={'x': 'Day', 'y': 'Total Amount (₹)'}
         )
         
         # Advanced category treemap
-        category_spending = self.debits.groupby('name')['amount'].sum().nlargest(15)
+        names = self.data['name'].cat
+        name_totals = np.bincount(
+            names.codes.to_numpy()[is_debit],
+            weights=debit_amounts,
+            minlength=len(names.categories)
+        )
+        category_spending = pd.Series(name_totals, index=names.categories)
+        category_spending = category_spending[category_spending > 0].nlargest(15)
         fig_category_treemap = px.treemap(
             names=category_spending.index, 
-            values=category_spending.values, 
+            values=category_spending.to_numpy(dtype=np.float64), 
             title='Top 15 Spending Categories Treemap (₹)'
         )
         
@@ -153,11 +201,13 @@ class AdvancedBankAnalysisDashboard:
     def visualize_additional_insights(self):
         """Create additional advanced visualizations"""
         # 1. Cumulative Cash Flow Chart
-        cumulative_cash_flow = self.data.groupby('date')['amount'].sum().cumsum()
+        # Bucket by calendar day first so the chart has one point per day, not per transaction
+        daily_flow = self.data['amount'].astype(np.float64).groupby(self.data['date'].dt.normalize()).sum()
+        cumulative_cash_flow = daily_flow.cumsum()
         fig_cash_flow = go.Figure()
         fig_cash_flow.add_trace(go.Scatter(
-            x=cumulative_cash_flow.index, 
-            y=cumulative_cash_flow.values, 
+            x=cumulative_cash_flow.index.values, 
+            y=cumulative_cash_flow.to_numpy(), 
             mode='lines', 
             name='Cumulative Cash Flow',
             line=dict(color='blue', width=2)
@@ -170,10 +220,16 @@ class AdvancedBankAnalysisDashboard:
         )
 
         # 2. Transaction Frequency Heatmap
-        transaction_freq = self.data.groupby([
-            self.data['date'].dt.day_name(), 
-            self.data['date'].dt.hour
-        ])['amount'].count().unstack()
+        # Undated rows (weekday code -1, NaN hour) have no cell in the grid
+        day_codes = self.data['day_of_week'].cat.codes.to_numpy()
+        has_date = day_codes >= 0
+        hour = self.data['hour'].to_numpy()[has_date].astype(np.intp)
+        cell_index = day_codes[has_date].astype(np.intp) * 24 + hour
+        transaction_freq = pd.DataFrame(
+            np.bincount(cell_index, minlength=len(DAY_ORDER) * 24).reshape(len(DAY_ORDER), 24),
+            index=DAY_ORDER,
+            columns=range(24)
+        )
         
         fig_heatmap = px.imshow(
             transaction_freq, 
@@ -183,10 +239,8 @@ class AdvancedBankAnalysisDashboard:
 
         # 3. Recurring Transactions Analysis
         recurring_threshold = self.data['amount'].mean()
-        recurring_transactions = self.data[
-            self.data.groupby('name')['amount'].transform('mean') > recurring_threshold
-        ]
-        recurring_summary = recurring_transactions.groupby('name')['amount'].agg(['mean', 'count'])
+        name_summary = self.data.groupby('name', observed=True, sort=False)['amount'].agg(['mean', 'count'])
+        recurring_summary = name_summary[name_summary['mean'] > recurring_threshold]
         
         fig_recurring = px.scatter(
             recurring_summary, 
@@ -233,12 +287,47 @@ class AdvancedBankAnalysisDashboard:
         
         return recommendations
 
-def render_advanced_dashboard(data):
-    """Advanced Streamlit dashboard rendering function"""
-    # Initialize analysis
+@st.cache_data(show_spinner=False)
+def load_data(data_path, modified_time):
+    """Load the transaction CSV; modified_time ties the cache entry to the file version"""
+    return pd.read_csv(
+        data_path,
+        engine='pyarrow',
+        parse_dates=['date'],
+        dtype={'DrCr': 'category', 'amount': 'float64'}
+    )
+
+@st.cache_data(show_spinner=False)
+def analyze_data(data):
+    """Run the full analysis once per distinct dataset and cache the results"""
     analyzer = AdvancedBankAnalysisDashboard(data)
     metrics = analyzer.calculate_advanced_metrics()
-    anomalies = analyzer.detect_anomalies_advanced()
+    
+    # The analyses only read analyzer.data, so they can share a pool. Most of their
+    # time goes to building Plotly figures in Python, which holds the GIL, so the
+    # overlap is small; the result is cached per dataset anyway
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        anomalies_future = executor.submit(analyzer.detect_anomalies_advanced)
+        trend_future = executor.submit(analyzer.visualize_advanced_trends)
+        distribution_future = executor.submit(analyzer.visualize_comprehensive_distribution)
+        insights_future = executor.submit(analyzer.visualize_additional_insights)
+    
+    anomalies = anomalies_future.result()
+    return {
+        'metrics': metrics,
+        'anomalies': anomalies,
+        'trend_fig': trend_future.result(),
+        'distribution_figs': distribution_future.result(),
+        'insight_figs': insights_future.result(),
+        'recommendations': analyzer.generate_advanced_recommendations(metrics, anomalies)
+    }
+
+def render_advanced_dashboard(data):
+    """Advanced Streamlit dashboard rendering function"""
+    # Initialize analysis (cached across Streamlit reruns)
+    results = analyze_data(data)
+    metrics = results['metrics']
+    anomalies = results['anomalies']
     
     # Dashboard Layout
     st.title('💰 Bank Statement Analysis Dashboard')
@@ -251,16 +340,17 @@ def render_advanced_dashboard(data):
     col4.metric("Cash Flow Volatility", f"{metrics['cash_flow_volatility']:.2f}%")
     
     # Visualization Rows
-    st.plotly_chart(analyzer.visualize_advanced_trends(), use_container_width=True)
+    st.plotly_chart(results['trend_fig'], use_container_width=True)
     
     # Distribution Visualizations
     col_day, col_category = st.columns(2)
+    day_spend_fig, category_treemap_fig = results['distribution_figs']
     
     with col_day:
-        st.plotly_chart(analyzer.visualize_comprehensive_distribution()[0])
+        st.plotly_chart(day_spend_fig)
     
     with col_category:
-        st.plotly_chart(analyzer.visualize_comprehensive_distribution()[1])
+        st.plotly_chart(category_treemap_fig)
     
     # New Additional Visualizations Section
     st.header('🔍 Advanced Financial Insights')
@@ -269,7 +359,7 @@ def render_advanced_dashboard(data):
     col_cash_flow, col_freq, col_recurring = st.columns(3)
     
     # Additional Visualizations
-    cash_flow_fig, heatmap_fig, recurring_fig = analyzer.visualize_additional_insights()
+    cash_flow_fig, heatmap_fig, recurring_fig = results['insight_figs']
     
     with col_cash_flow:
         st.plotly_chart(cash_flow_fig, use_container_width=True)
@@ -286,15 +376,14 @@ def render_advanced_dashboard(data):
     
     # Recommendations Section
     st.header('🎯 Smart Financial Recommendations')
-    recommendations = analyzer.generate_advanced_recommendations(metrics, anomalies)
-    for rec in recommendations:
+    for rec in results['recommendations']:
         st.markdown(f"- {rec}")
 
 def main():
     # Directly load the local CSV file
     data_path = 'Data/bankstatements.csv'
     try:
-        data = pd.read_csv(data_path)
+        data = load_data(data_path, os.path.getmtime(data_path))
         render_advanced_dashboard(data)
     except Exception as e:
         st.error(f"Error loading file: {e}")